@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Startup benchmark: import-time profile and cold start to first /api/health"""
+
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+PORT = int(os.environ.get('BENCH_PORT', 5055))
+TOP_N = int(os.environ.get('BENCH_TOP_IMPORTS', 15))
+# 'gunicorn' runs the deployed setup (Procfile, Dockerfile, app.yaml);
+# 'werkzeug' runs the development server, which starts differently
+SERVER_KIND = os.environ.get('BENCH_SERVER', 'gunicorn')
+
+def import_profile():
+    """Return (cumulative_us, module) pairs for `import debate_coach`, slowest first"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import debate_coach'],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else 'import failed')
+        return []
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), module.rstrip()))
+    return sorted(entries, reverse=True)
+
+SERVERS = {
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '--worker-class', 'eventlet', '-w', '1',
+                 '--bind', f'127.0.0.1:{PORT}', 'debate_coach:app'],
+    'werkzeug': [sys.executable, '-c',
+                 "import os, debate_coach as app_module; "
+                 "app_module.start_prewarm_after_bind(int(os.environ['PORT'])); "
+                 "app_module.socketio.run(app_module.app, host='127.0.0.1', "
+                 "port=int(os.environ['PORT']), allow_unsafe_werkzeug=True)"],
+}
+
+def wait_for(path, start, server, deadline=60):
+    """Poll until path answers 200; return seconds since start, or None"""
+    while time.time() - start < deadline:
+        if server.poll() is not None:
+            return None
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{PORT}{path}', timeout=1) as response:
+                if response.status == 200:
+                    return time.time() - start
+        except OSError:
+            time.sleep(0.05)
+    return None
+
+def cold_start():
+    """Seconds from process launch to the first /api/health and /api/ready 200s"""
+    env = dict(os.environ, PORT=str(PORT), PREWARM='1')
+    start = time.time()
+    server = subprocess.Popen(SERVERS[SERVER_KIND], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        health = wait_for('/api/health', start, server)
+        ready = wait_for('/api/ready', start, server) if health is not None else None
+        return health, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == '__main__':
+    print('=== Import-time profile: import debate_coach ===')
+    entries = import_profile()
+    for cumulative, module in entries[:TOP_N]:
+        print(f'{cumulative / 1000:10.1f} ms  {module}')
+
+    print(f'\n=== Cold start ({SERVER_KIND}) ===')
+    for label, elapsed in zip(('/api/health', '/api/ready'), cold_start()):
+        if elapsed is None:
+            print(f'cold start to first {label}: server did not answer')
+        else:
+            print(f'cold start to first {label}: {elapsed * 1000:.0f} ms')
@@ -0,0 +1,9 @@
+# Gunicorn reads this file automatically from the working directory.
+
+def post_worker_init(worker):
+    # The master has already bound the port; with PREWARM enabled, warm the
+    # heavy clients in an OS thread so the eventlet loop keeps serving
+    # /api/health while they load.
+    import debate_coach
+    if debate_coach.PREWARM:
+        debate_coach.start_prewarm()
@@ -0,0 +1,207 @@
+"""Cost-weighted token-bucket rate limiting for the debate coach API"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Each request draws tokens from the caller's bucket and from the bucket of
+# every upstream API key it will hit, so a single client cannot burn the
+# shared Gemini and SerpAPI quotas for everyone else.
+RATE_LIMIT_COSTS = {
+    'debate_message': {'user': 4, 'gemini': 2, 'serpapi': 2},
+    'analyze': {'user': 2, 'gemini': 1, 'serpapi': 1},
+    'practice_question': {'user': 1},
+    'history': {'user': 1},
+}
+
+RATE_LIMIT_BUCKETS = {
+    # bucket: (capacity, tokens refilled per second)
+    'user': (float(os.environ.get('RATE_LIMIT_USER_CAPACITY', 20)),
+             float(os.environ.get('RATE_LIMIT_USER_REFILL', 0.2))),
+    # Callers without a token, keyed by client address. Kept no larger than
+    # 'user' so dropping the token never buys a bigger budget, and so one
+    # address cannot drain a shared upstream bucket faster than it refills.
+    'ip': (float(os.environ.get('RATE_LIMIT_IP_CAPACITY', 20)),
+           float(os.environ.get('RATE_LIMIT_IP_REFILL', 0.2))),
+    'gemini': (float(os.environ.get('RATE_LIMIT_GEMINI_CAPACITY', 60)),
+               float(os.environ.get('RATE_LIMIT_GEMINI_REFILL', 1.0))),
+    'serpapi': (float(os.environ.get('RATE_LIMIT_SERPAPI_CAPACITY', 30)),
+                float(os.environ.get('RATE_LIMIT_SERPAPI_REFILL', 0.5))),
+}
+
+# Buckets that have refilled to capacity read the same as missing ones, so
+# both stores forget them at most this often to bound memory and rows
+PRUNE_INTERVAL = 60
+
+def full_at(tokens, capacity, refill, now):
+    """Time at which a bucket holding tokens will have refilled to capacity"""
+    return now + (capacity - tokens) / refill
+
+class MemoryRateLimitStore:
+    """Token buckets kept in process memory (one worker only)"""
+    def __init__(self):
+        # key -> (tokens, updated_at, full_at)
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.last_prune = 0.0
+
+    def prune(self, now):
+        if now - self.last_prune < PRUNE_INTERVAL:
+            return
+        self.last_prune = now
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+
+    def consume(self, charges, now=None):
+        """Take tokens from every bucket or none; return seconds to wait (0 if allowed)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            self.prune(now)
+            levels = {}
+            retry_after = 0.0
+            for key, cost, capacity, refill in charges:
+                tokens, updated_at, _ = self.buckets.get(key, (capacity, now, now))
+                tokens = min(capacity, tokens + (now - updated_at) * refill)
+                levels[key] = tokens
+                if tokens < cost:
+                    retry_after = max(retry_after, (cost - tokens) / refill)
+
+            if retry_after:
+                return retry_after
+
+            for key, cost, capacity, refill in charges:
+                tokens = levels[key] - cost
+                self.buckets[key] = (tokens, now, full_at(tokens, capacity, refill, now))
+            return 0.0
+
+    def drain(self, key, capacity, refill, now=None):
+        """Empty a bucket, e.g. after the upstream reported its own quota exhausted"""
+        now = time.time() if now is None else now
+        with self.lock:
+            self.buckets[key] = (0.0, now, full_at(0.0, capacity, refill, now))
+
+# Retry hint when the shared store is too contended to answer; the request is
+# refused (fail closed) rather than let through uncounted
+BUSY_RETRY_AFTER = 1.0
+
+class SQLiteRateLimitStore:
+    """Token buckets shared by every worker process through the SQLite database"""
+    def __init__(self, db_path='debate_coach.db', timeout=5):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.last_prune = 0.0
+        conn = sqlite3.connect(self.db_path)
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(rate_limits)')]
+        if columns and 'full_at' not in columns:
+            # Bucket levels are transient, so an older table is simply rebuilt
+            conn.execute('DROP TABLE rate_limits')
+        conn.execute('''CREATE TABLE IF NOT EXISTS rate_limits
+                        (key TEXT PRIMARY KEY, tokens REAL, updated_at REAL, full_at REAL)''')
+        conn.execute('CREATE INDEX IF NOT EXISTS rate_limits_full_at ON rate_limits (full_at)')
+        conn.commit()
+        conn.close()
+
+    def consume(self, charges, now=None):
+        """Take tokens from every bucket or none; return seconds to wait (0 if allowed)"""
+        now = time.time() if now is None else now
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+        try:
+            # IMMEDIATE takes the write lock up front so concurrent workers
+            # cannot both read the same level and overspend the bucket
+            conn.execute('BEGIN IMMEDIATE')
+            if now - self.last_prune >= PRUNE_INTERVAL:
+                conn.execute('DELETE FROM rate_limits WHERE full_at <= ?', (now,))
+                self.last_prune = now
+            levels = {}
+            retry_after = 0.0
+            for key, cost, capacity, refill in charges:
+                row = conn.execute('SELECT tokens, updated_at FROM rate_limits WHERE key = ?',
+                                   (key,)).fetchone()
+                tokens, updated_at = row if row else (capacity, now)
+                tokens = min(capacity, tokens + (now - updated_at) * refill)
+                levels[key] = tokens
+                if tokens < cost:
+                    retry_after = max(retry_after, (cost - tokens) / refill)
+
+            if not retry_after:
+                for key, cost, capacity, refill in charges:
+                    tokens = levels[key] - cost
+                    conn.execute('INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)',
+                                 (key, tokens, now, full_at(tokens, capacity, refill, now)))
+            conn.execute('COMMIT')
+            return retry_after
+        except sqlite3.OperationalError as e:
+            # Usually 'database is locked' after the busy timeout
+            print(f"Rate limit store unavailable: {e}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            return BUSY_RETRY_AFTER
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def drain(self, key, capacity, refill, now=None):
+        """Empty a bucket, e.g. after the upstream reported its own quota exhausted"""
+        now = time.time() if now is None else now
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        try:
+            conn.execute('INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?)',
+                         (key, 0.0, now, full_at(0.0, capacity, refill, now)))
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            # Best effort: the bucket still throttles callers as it empties
+            print(f"Rate limit store unavailable: {e}")
+        finally:
+            conn.close()
+
+class RateLimiter:
+    def __init__(self, store, costs=RATE_LIMIT_COSTS, buckets=RATE_LIMIT_BUCKETS):
+        self.store = store
+        self.costs = costs
+        self.buckets = buckets
+        self.validate()
+
+    def validate(self):
+        """Reject limits that would deny an action forever"""
+        for bucket, (capacity, refill) in self.buckets.items():
+            # Unauthenticated callers pay the 'user' costs from the 'ip' bucket
+            cost_bucket = 'user' if bucket == 'ip' else bucket
+            max_cost = max((costs.get(cost_bucket, 0) for costs in self.costs.values()), default=0)
+            if refill <= 0:
+                raise ValueError(f"Rate limit refill for '{bucket}' must be positive, got {refill}")
+            if capacity < max_cost:
+                raise ValueError(f"Rate limit capacity for '{bucket}' is {capacity}, "
+                                 f"below the largest action cost {max_cost}")
+
+    def check(self, action, identity):
+        """Charge an action to the caller and the upstream keys; return retry_after seconds"""
+        charges = []
+        for bucket, cost in self.costs[action].items():
+            if bucket == 'user':
+                key = f"user:{identity}"
+                if identity.startswith('ip:'):
+                    bucket = 'ip'
+            else:
+                key = f"upstream:{bucket}"
+            capacity, refill = self.buckets[bucket]
+            charges.append((key, cost, capacity, refill))
+        return self.store.consume(charges)
+
+    def upstream_exhausted(self, bucket):
+        """Back off an upstream key once the provider itself starts refusing calls"""
+        capacity, refill = self.buckets[bucket]
+        self.store.drain(f"upstream:{bucket}", capacity, refill)
+
+def create_rate_limiter(unmetered=()):
+    """Build the limiter for RATE_LIMIT_BACKEND; buckets in unmetered are never charged"""
+    costs = {action: {bucket: cost for bucket, cost in charges.items() if bucket not in unmetered}
+             for action, charges in RATE_LIMIT_COSTS.items()}
+    backend = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    if backend == 'sqlite':
+        return RateLimiter(SQLiteRateLimitStore(), costs=costs)
+    if backend == 'memory':
+        return RateLimiter(MemoryRateLimitStore(), costs=costs)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
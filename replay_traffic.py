@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Replay recorded debate traffic against a running instance and report latency.
+
+Record traffic by starting the app with TRAFFIC_RECORD_PATH=traffic.jsonl, then
+replay it against an instance started with FAKE_BACKENDS=1:
+
+    python replay_traffic.py traffic.jsonl --url http://localhost:5000 --speed 4
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+
+from traffic import REDACTED, percentile
+
+def load_traffic(path):
+    """Read recorded entries, oldest first"""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entries.append(json.loads(line))
+    return sorted(entries, key=lambda entry: entry['ts'])
+
+def scheduled_time(entry, t0, start, speed):
+    """Wall-clock time an entry should be sent at, scaled by speed (0 = now)"""
+    return start + (entry['ts'] - t0) / speed if speed else start
+
+def wait_until(scheduled):
+    delay = scheduled - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.max_lag = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, key, latency, outcome, lag):
+        with self.lock:
+            self.latencies[key].append(latency * 1000)
+            self.outcomes[key][outcome] += 1
+            self.max_lag = max(self.max_lag, lag)
+
+    def report(self):
+        print(f"{'endpoint / event':<36} {'count':>6} {'p50':>9} {'p90':>9} {'p95':>9} {'p99':>9} {'max':>9}  outcomes")
+        for key in sorted(self.latencies):
+            values = self.latencies[key]
+            outcomes = ', '.join(f"{name}={count}" for name, count in sorted(self.outcomes[key].items()))
+            print(f"{key:<36} {len(values):>6} "
+                  f"{percentile(values, 50):>7.0f}ms {percentile(values, 90):>7.0f}ms "
+                  f"{percentile(values, 95):>7.0f}ms {percentile(values, 99):>7.0f}ms "
+                  f"{max(values):>7.0f}ms  {outcomes}")
+        print(f"\nmax schedule lag: {self.max_lag * 1000:.0f}ms")
+
+def send_rest(args, results, entry, scheduled):
+    sent = time.time()
+    headers = {'Authorization': f"Bearer {args.token}"} if entry.get('auth') else {}
+    try:
+        response = requests.request(entry['method'], args.url + entry['path'],
+                                    json=entry.get('body'), headers=headers,
+                                    timeout=args.timeout)
+        outcome = str(response.status_code)
+    except requests.RequestException:
+        outcome = 'error'
+    results.add(f"{entry['method']} {entry['path']}", time.time() - sent, outcome,
+                max(0.0, sent - scheduled))
+
+def replay_rest(args, results, entries, t0, start):
+    """Send each REST entry at its own scheduled time, whether or not earlier ones returned"""
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for entry in entries:
+            scheduled = scheduled_time(entry, t0, start, args.speed)
+            wait_until(scheduled)
+            pool.submit(send_rest, args, results, entry, scheduled)
+
+class ReplayClient:
+    """Replays one recorded Socket.IO session's events in order, like a single browser tab"""
+    def __init__(self, args, results):
+        self.args = args
+        self.results = results
+        self.sio = None
+        self.replies = queue.Queue()
+
+    def connect_socket(self):
+        sio = socketio.Client()
+        for event in ('debate_feedback', 'ai_response', 'rate_limited'):
+            sio.on(event, lambda data, event=event: self.replies.put(event))
+        sio.connect(self.args.url)
+        self.sio = sio
+
+    def send_event(self, entry):
+        # Drop late replies to an earlier message that timed out
+        while not self.replies.empty():
+            self.replies.get_nowait()
+        data = dict(entry['data'])
+        # Tokens are redacted when recorded; authenticate like the REST replay
+        if data.get('token') == REDACTED:
+            data['token'] = self.args.token
+        self.sio.emit(entry['event'], data)
+
+        # debate_message answers with debate_feedback then ai_response,
+        # or a single rate_limited event
+        pending = {'debate_feedback', 'ai_response'}
+        deadline = time.time() + self.args.timeout
+        while pending:
+            try:
+                event = self.replies.get(timeout=max(0, deadline - time.time()))
+            except queue.Empty:
+                return 'timeout'
+            if event == 'rate_limited':
+                return 'rate_limited'
+            pending.discard(event)
+        return 'ok'
+
+    def run(self, entries, t0, start):
+        try:
+            for entry in entries:
+                scheduled = scheduled_time(entry, t0, start, self.args.speed)
+                wait_until(scheduled)
+                lag = max(0.0, time.time() - scheduled)
+                key = f"socketio {entry['event']}"
+
+                # The handshake gets its own row so it doesn't skew the first event
+                if self.sio is None:
+                    connecting = time.time()
+                    try:
+                        self.connect_socket()
+                        outcome = 'ok'
+                    except (socketio.exceptions.SocketIOError, OSError) as e:
+                        print(f"Socket.IO error connecting: {e}")
+                        outcome = 'error'
+                    self.results.add('socketio connect', time.time() - connecting, outcome, lag)
+                    if self.sio is None:
+                        self.results.add(key, 0.0, 'error', lag)
+                        continue
+
+                sent = time.time()
+                try:
+                    outcome = self.send_event(entry)
+                except (socketio.exceptions.SocketIOError, OSError) as e:
+                    print(f"Socket.IO error replaying {entry['event']}: {e}")
+                    outcome = 'error'
+                self.results.add(key, time.time() - sent, outcome, lag)
+        finally:
+            if self.sio is not None:
+                self.sio.disconnect()
+
+def replay(args):
+    entries = load_traffic(args.traffic)
+    if not entries:
+        print('No traffic recorded')
+        return
+
+    # REST entries are replayed open-loop, since their recorded address does
+    # not identify a session; Socket.IO sessions are replayed per sid
+    rest_entries = [entry for entry in entries if entry['type'] == 'rest']
+    by_session = defaultdict(list)
+    for entry in entries:
+        if entry['type'] == 'socketio':
+            by_session[entry['client']].append(entry)
+
+    results = Results()
+    t0 = entries[0]['ts']
+    start = time.time() + 0.5
+    threads = [threading.Thread(target=ReplayClient(args, results).run, args=(session_entries, t0, start))
+               for session_entries in by_session.values()]
+    threads.append(threading.Thread(target=replay_rest, args=(args, results, rest_entries, t0, start)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"Replayed {len(entries)} entries ({len(rest_entries)} REST, "
+          f"{len(by_session)} Socket.IO sessions) "
+          f"in {time.time() - start:.1f}s at {args.speed or 'max'}x speed\n")
+    results.report()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('traffic', help='JSONL file written via TRAFFIC_RECORD_PATH')
+    parser.add_argument('--url', default='http://localhost:5000', help='instance to replay against')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='time scaling: 1 = recorded pace, 4 = four times faster, 0 = no waits')
+    parser.add_argument('--token', default='demo-session-token',
+                        help='bearer token for requests that were authenticated when recorded')
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds to wait for each reply')
+    parser.add_argument('--workers', type=int, default=64,
+                        help='most REST requests in flight at once')
+    replay(parser.parse_args())
@@ -0,0 +1,120 @@
+import sqlite3
+
+import pytest
+
+from rate_limit import (BUSY_RETRY_AFTER, PRUNE_INTERVAL, MemoryRateLimitStore, RateLimiter,
+                        SQLiteRateLimitStore, create_rate_limiter)
+
+COSTS = {
+    'turn': {'user': 4, 'gemini': 2},
+    'read': {'user': 1},
+}
+BUCKETS = {
+    'user': (8, 1.0),
+    'ip': (8, 1.0),
+    'gemini': (4, 0.5),
+}
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryRateLimitStore()
+    return SQLiteRateLimitStore(str(tmp_path / 'rate_limits.db'))
+
+def test_bucket_starts_full_and_refills(store):
+    charge = [('user:a', 4, 8, 1.0)]
+    assert store.consume(charge, now=100) == 0
+    assert store.consume(charge, now=100) == 0
+    assert store.consume(charge, now=100) == pytest.approx(4.0)
+    assert store.consume(charge, now=102) == pytest.approx(2.0)
+    assert store.consume(charge, now=104) == 0
+
+def test_refill_is_capped_at_capacity(store):
+    charge = [('user:a', 8, 8, 1.0)]
+    assert store.consume(charge, now=100) == 0
+    assert store.consume(charge, now=1000) == 0
+    assert store.consume(charge, now=1000) == pytest.approx(8.0)
+
+def test_consume_is_all_or_nothing(store):
+    assert store.consume([('upstream:gemini', 4, 4, 0.5)], now=100) == 0
+    # The user bucket has room, but the upstream does not: neither is charged
+    denied = [('user:a', 4, 8, 1.0), ('upstream:gemini', 2, 4, 0.5)]
+    assert store.consume(denied, now=100) == pytest.approx(4.0)
+    assert store.consume([('user:a', 8, 8, 1.0)], now=100) == 0
+
+def test_drain_empties_a_bucket(store):
+    store.drain('upstream:gemini', 4, 0.5, now=100)
+    assert store.consume([('upstream:gemini', 1, 4, 0.5)], now=100) == pytest.approx(2.0)
+
+def stored_keys(store):
+    if isinstance(store, MemoryRateLimitStore):
+        return set(store.buckets)
+    conn = sqlite3.connect(store.db_path)
+    keys = {row[0] for row in conn.execute('SELECT key FROM rate_limits')}
+    conn.close()
+    return keys
+
+def test_refilled_buckets_are_pruned(store):
+    store.consume([('user:a', 1, 8, 1.0)], now=100)
+    store.consume([('user:b', 8, 8, 1.0)], now=100)
+    assert stored_keys(store) == {'user:a', 'user:b'}
+    # a is full again after 1s and b after 8s; pruning waits for the interval
+    store.consume([('user:c', 1, 8, 1.0)], now=105)
+    assert stored_keys(store) == {'user:a', 'user:b', 'user:c'}
+    store.consume([('user:c', 1, 8, 1.0)], now=100 + PRUNE_INTERVAL)
+    assert stored_keys(store) == {'user:c'}
+    # A pruned bucket reads as full
+    assert store.consume([('user:b', 8, 8, 1.0)], now=100 + PRUNE_INTERVAL) == 0
+
+def test_limiter_charges_user_and_upstream(store):
+    limiter = RateLimiter(store, costs=COSTS, buckets=BUCKETS)
+    assert limiter.check('turn', 'alice') == 0
+    assert limiter.check('turn', 'bob') == 0
+    # gemini (capacity 4) is now empty for everyone, reads still pass
+    assert limiter.check('turn', 'carol') > 0
+    assert limiter.check('read', 'carol') == 0
+
+def test_limiter_keeps_users_apart(store):
+    limiter = RateLimiter(store, costs=COSTS, buckets=BUCKETS)
+    for _ in range(8):
+        assert limiter.check('read', 'alice') == 0
+    assert limiter.check('read', 'alice') > 0
+    assert limiter.check('read', 'bob') == 0
+
+def test_sqlite_store_refuses_when_locked(tmp_path):
+    db_path = str(tmp_path / 'rate_limits.db')
+    store = SQLiteRateLimitStore(db_path, timeout=0.1)
+    holder = sqlite3.connect(db_path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        assert store.consume([('user:a', 1, 8, 1.0)], now=100) == BUSY_RETRY_AFTER
+        store.drain('upstream:gemini', 4, 0.5, now=100)
+    finally:
+        holder.execute('ROLLBACK')
+        holder.close()
+    assert store.consume([('user:a', 1, 8, 1.0)], now=100) == 0
+
+@pytest.mark.parametrize('buckets, message', [
+    ({**BUCKETS, 'user': (8, 0)}, "refill for 'user' must be positive"),
+    ({**BUCKETS, 'gemini': (4, -1.0)}, "refill for 'gemini' must be positive"),
+    ({**BUCKETS, 'user': (3, 1.0)}, "capacity for 'user' is 3"),
+    ({**BUCKETS, 'ip': (3, 1.0)}, "capacity for 'ip' is 3"),
+])
+def test_validate_rejects_limits_that_never_admit(buckets, message):
+    with pytest.raises(ValueError, match=message):
+        RateLimiter(MemoryRateLimitStore(), costs=COSTS, buckets=buckets)
+
+def test_sqlite_store_rebuilds_old_table(tmp_path):
+    db_path = str(tmp_path / 'rate_limits.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE rate_limits (key TEXT PRIMARY KEY, tokens REAL, updated_at REAL)')
+    conn.commit()
+    conn.close()
+    store = SQLiteRateLimitStore(db_path)
+    assert store.consume([('user:a', 1, 8, 1.0)], now=100) == 0
+
+def test_unmetered_buckets_are_not_charged(monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_BACKEND', 'memory')
+    limiter = create_rate_limiter(unmetered=('serpapi',))
+    assert limiter.check('analyze', 'alice') == 0
+    assert set(limiter.store.buckets) == {'user:alice', 'upstream:gemini'}
@@ -0,0 +1,35 @@
+import pytest
+
+from traffic import REDACTED, percentile, redact
+
+def test_redact_masks_secrets_in_bodies_and_event_data():
+    entry = {
+        'type': 'rest',
+        'path': '/api/login',
+        'body': {'username': 'alice', 'password': 'hunter2'},
+    }
+    assert redact(entry) == {
+        'type': 'rest',
+        'path': '/api/login',
+        'body': {'username': 'alice', 'password': REDACTED},
+    }
+    event = {'type': 'socketio', 'data': {'message': 'hi', 'token': 'abc'}}
+    assert redact(event)['data'] == {'message': 'hi', 'token': REDACTED}
+
+def test_redact_leaves_the_original_and_non_dict_fields_alone():
+    entry = {'body': {'token': 'abc'}, 'client': '10.0.0.1', 'data': None}
+    assert redact(entry) == {'body': {'token': REDACTED}, 'client': '10.0.0.1', 'data': None}
+    assert entry['body'] == {'token': 'abc'}
+
+@pytest.mark.parametrize('values, pct, expected', [
+    ([1, 2, 3, 4, 5], 50, 3),
+    ([1, 2, 3, 4], 50, 2),
+    ([5, 1, 4, 2, 3], 90, 5),
+    (list(range(1, 101)), 99, 99),
+    (list(range(1, 101)), 95, 95),
+    ([7], 99, 7),
+    ([1, 2, 3], 0, 1),
+    ([1, 2, 3], 100, 3),
+])
+def test_percentile_is_nearest_rank(values, pct, expected):
+    assert percentile(values, pct) == expected
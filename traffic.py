@@ -0,0 +1,21 @@
+"""Recorded traffic format shared by the app's recorder and replay_traffic.py"""
+
+import math
+
+REDACTED = '<redacted>'
+REDACTED_FIELDS = ('password', 'token')
+
+def redact(entry):
+    """Copy of a traffic entry with secrets in its request body or event data masked"""
+    redacted = {}
+    for key, value in entry.items():
+        if isinstance(value, dict):
+            value = {k: (REDACTED if k in REDACTED_FIELDS else v) for k, v in value.items()}
+        redacted[key] = value
+    return redacted
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[min(index, len(ordered) - 1)]